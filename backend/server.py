@@ -1,17 +1,30 @@
-from fastapi import FastAPI, APIRouter, HTTPException
+from fastapi import FastAPI, APIRouter, HTTPException, Response
+from fastapi.responses import ORJSONResponse, StreamingResponse
 from dotenv import load_dotenv
 from starlette.middleware.cors import CORSMiddleware
 from motor.motor_asyncio import AsyncIOMotorClient
 import os
+import re
+import asyncio
+import hashlib
 import logging
 from pathlib import Path
-from pydantic import BaseModel, Field, ConfigDict
+from pydantic import BaseModel, Field, ConfigDict, TypeAdapter
 from typing import List, Optional, Literal
 import uuid
 from datetime import datetime, timezone
 from emergentintegrations.llm.chat import LlmChat, UserMessage
-import json
+import httpx
+import orjson
 from groq import AsyncGroq
+from pymongo.errors import DuplicateKeyError
+
+# Use uvloop for the asyncio event loop when available (not supported on Windows)
+try:
+    import uvloop
+    asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+except ImportError:
+    pass
 
 ROOT_DIR = Path(__file__).parent
 load_dotenv(ROOT_DIR / '.env')
@@ -21,8 +34,8 @@ mongo_url = os.environ['MONGO_URL']
 client = AsyncIOMotorClient(mongo_url)
 db = client[os.environ['DB_NAME']]
 
-# Create the main app
-app = FastAPI()
+# Create the main app (orjson for faster response serialization)
+app = FastAPI(default_response_class=ORJSONResponse)
 api_router = APIRouter(prefix="/api")
 
 # Logging
@@ -32,17 +45,19 @@ logger = logging.getLogger(__name__)
 # ============ MODELS ============
 
 class GeneratePromptRequest(BaseModel):
+    model_config = ConfigDict(frozen=True)
+
     keyword: str
     style: Literal["photo", "illustration", "vector", "logo"]
     provider: Literal["openai", "claude", "gemini", "groq"]
     model: str
-    quantity: int
+    quantity: int = Field(ge=1, le=50)
     output_format: Literal["json", "text"]
     api_key: Optional[str] = None
     use_emergent_key: bool = False
 
 class PromptGeneration(BaseModel):
-    model_config = ConfigDict(extra="ignore")
+    model_config = ConfigDict(extra="ignore", frozen=True)
     
     id: str = Field(default_factory=lambda: str(uuid.uuid4()))
     keyword: str
@@ -55,7 +70,7 @@ class PromptGeneration(BaseModel):
     created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
 
 class FavoritePrompt(BaseModel):
-    model_config = ConfigDict(extra="ignore")
+    model_config = ConfigDict(extra="ignore", frozen=True)
     
     id: str = Field(default_factory=lambda: str(uuid.uuid4()))
     prompt_generation_id: str
@@ -65,20 +80,72 @@ class FavoritePrompt(BaseModel):
     saved_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
 
 class SaveFavoriteRequest(BaseModel):
+    model_config = ConfigDict(frozen=True)
+
     prompt_generation_id: str
     prompt_text: str
     keyword: str
     style: str
 
+# Prebuilt adapters validate and serialize whole lists in pydantic-core,
+# instead of FastAPI re-validating item by item on every request
+HISTORY_ADAPTER = TypeAdapter(List[PromptGeneration])
+FAVORITES_ADAPTER = TypeAdapter(List[FavoritePrompt])
+
 # ============ HELPER FUNCTIONS ============
 
+# Strong references keep fire-and-forget write tasks alive until done
+BG_TASKS = set()
+
+async def run_db_write(coro):
+    try:
+        await coro
+    except DuplicateKeyError:
+        # A concurrent request cached the same parameters first
+        pass
+    except Exception as e:
+        logger.error(f"Background DB write failed: {str(e)}")
+
+def background_db_write(coro):
+    """Run a DB write without blocking the response on the Mongo round-trip"""
+    task = asyncio.create_task(run_db_write(coro))
+    BG_TASKS.add(task)
+    task.add_done_callback(BG_TASKS.discard)
+
+# All static instruction text lives in the system message so every request
+# shares a stable prefix, letting vendor-side prompt caching (OpenAI, Anthropic)
+# kick in; only keyword/style/quantity vary per request in the user message.
+SYSTEM_MESSAGE = """You are an expert at creating detailed, professional prompts for microstock platforms like Shutterstock, Adobe Stock, and Getty Images. Generate prompts that are descriptive, keyword-rich, and optimized for discoverability.
+
+Each prompt you produce must:
+- Be descriptive and specific
+- Include relevant keywords for microstock discoverability
+- Mention composition, lighting, mood, and technical aspects
+- Be optimized for search engines
+- Be suitable for the requested style
+
+Format: Return ONLY a JSON array of strings, nothing else. Example: ["prompt 1", "prompt 2", ...]"""
+
+STYLE_DESCRIPTIONS = {
+    "photo": "realistic photography",
+    "illustration": "digital illustration or artwork",
+    "vector": "vector graphics with clean lines and shapes",
+    "logo": "logo design with branding elements"
+}
+
+GENERATION_PROMPT_TEMPLATE = 'Generate {quantity} unique, detailed prompts for {style_description} ({style} style) based on the keyword: "{keyword}"'
+
+def max_tokens_for(quantity: int) -> int:
+    """Cap completion length to roughly what the requested prompts need"""
+    return min(2000, 120 * quantity + 200)
+
 async def generate_with_emergent_integrations(provider: str, model: str, api_key: str, prompt: str) -> str:
     """Generate using emergentintegrations for OpenAI, Claude, Gemini"""
     try:
         chat = LlmChat(
             api_key=api_key,
             session_id=f"prompt-gen-{uuid.uuid4()}",
-            system_message="You are an expert at creating detailed, professional prompts for microstock platforms like Shutterstock, Adobe Stock, and Getty Images. Generate prompts that are descriptive, keyword-rich, and optimized for discoverability."
+            system_message=SYSTEM_MESSAGE
         )
         
         chat.with_model(provider, model)
@@ -89,22 +156,34 @@ async def generate_with_emergent_integrations(provider: str, model: str, api_key
         logger.error(f"Error generating with {provider}: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Error generating prompts: {str(e)}")
 
-async def generate_with_groq(api_key: str, model: str, prompt: str) -> str:
+# One AsyncGroq client per API key, so the pooled TCP/TLS connections are
+# reused across requests instead of re-handshaking on every call
+GROQ_CLIENTS = {}
+
+def get_groq_client(api_key: str) -> AsyncGroq:
+    groq_client = GROQ_CLIENTS.get(api_key)
+    if groq_client is None:
+        groq_client = GROQ_CLIENTS.setdefault(api_key, AsyncGroq(
+            api_key=api_key,
+            http_client=httpx.AsyncClient(
+                limits=httpx.Limits(max_keepalive_connections=64, keepalive_expiry=60)
+            )
+        ))
+    return groq_client
+
+async def generate_with_groq(api_key: str, model: str, prompt: str, max_tokens: int = 2000) -> str:
     """Generate using Groq"""
     try:
-        groq_client = AsyncGroq(api_key=api_key)
-        
+        groq_client = get_groq_client(api_key)
+
         response = await groq_client.chat.completions.create(
             model=model,
             messages=[
-                {
-                    "role": "system",
-                    "content": "You are an expert at creating detailed, professional prompts for microstock platforms like Shutterstock, Adobe Stock, and Getty Images. Generate prompts that are descriptive, keyword-rich, and optimized for discoverability."
-                },
+                {"role": "system", "content": SYSTEM_MESSAGE},
                 {"role": "user", "content": prompt}
             ],
             temperature=0.8,
-            max_tokens=2000
+            max_tokens=max_tokens
         )
         
         return response.choices[0].message.content
@@ -112,6 +191,273 @@ async def generate_with_groq(api_key: str, model: str, prompt: str) -> str:
         logger.error(f"Error generating with Groq: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Error generating with Groq: {str(e)}")
 
+async def stream_with_groq(api_key: str, model: str, prompt: str, max_tokens: int = 2000):
+    """Yield response text deltas from a streaming Groq completion"""
+    try:
+        groq_client = get_groq_client(api_key)
+
+        response = await groq_client.chat.completions.create(
+            model=model,
+            messages=[
+                {"role": "system", "content": SYSTEM_MESSAGE},
+                {"role": "user", "content": prompt}
+            ],
+            temperature=0.8,
+            max_tokens=max_tokens,
+            stream=True
+        )
+
+        async for chunk in response:
+            delta = chunk.choices[0].delta.content
+            if delta:
+                yield delta
+    except Exception as e:
+        logger.error(f"Error streaming with Groq: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Error streaming with Groq: {str(e)}")
+
+async def dispatch_emergent(provider: str, model: str, api_key: str, prompt: str, max_tokens: int) -> str:
+    # LlmChat exposes no completion-length knob, so max_tokens is unused here
+    return await generate_with_emergent_integrations(provider, model, api_key, prompt)
+
+async def dispatch_groq(provider: str, model: str, api_key: str, prompt: str, max_tokens: int) -> str:
+    return await generate_with_groq(api_key, model, prompt, max_tokens)
+
+# O(1) provider dispatch; adding a provider is one entry here
+PROVIDER_DISPATCH = {
+    "openai": dispatch_emergent,
+    "claude": dispatch_emergent,
+    "gemini": dispatch_emergent,
+    "groq": dispatch_groq
+}
+
+async def call_llm(provider: str, model: str, api_key: str, prompt: str, max_tokens: int = 2000) -> str:
+    """Dispatch a single generation call to the right provider client"""
+    handler = PROVIDER_DISPATCH.get(provider)
+    if handler is None:
+        raise HTTPException(status_code=400, detail="Invalid provider")
+    return await handler(provider, model, api_key, prompt, max_tokens)
+
+# Matches a ```json / ``` fenced block in one scan instead of repeated find()
+CODE_FENCE_RE = re.compile(r"```(?:json)?\s*(.*?)```", re.DOTALL)
+
+# Strips list numbering/bullets ("1. ", "- ", "2) ") from fallback lines
+CLEAN_RE = re.compile(r"^[\s\d.\-\)]*")
+
+def parse_prompts_response(response_text: str) -> List[str]:
+    """Extract the JSON array of prompts from an LLM response"""
+    try:
+        # Try to extract JSON from markdown code blocks
+        fence_match = CODE_FENCE_RE.search(response_text)
+        if fence_match:
+            response_text = fence_match.group(1).strip()
+
+        prompts_list = orjson.loads(response_text)
+
+        if not isinstance(prompts_list, list):
+            raise ValueError("Response is not a list")
+        return prompts_list
+    except Exception as e:
+        logger.error(f"Error parsing response: {str(e)}")
+        # Fallback: one pass over splitlines with a single cleanup regex
+        cleaned = (CLEAN_RE.sub("", line).strip() for line in response_text.splitlines())
+        return [p for p in cleaned if p]
+
+class StreamingPromptParser:
+    """Incrementally extracts the string elements of a JSON array from
+    streamed LLM output, so prompts can be emitted as soon as each one is
+    complete instead of after the full response.
+
+    Brackets, commas and code fences outside strings are skipped; each
+    completed string literal is decoded with orjson so escapes are handled
+    correctly.
+    """
+
+    def __init__(self):
+        self.in_string = False
+        self.escape = False
+        self.raw = []
+
+    def feed(self, chunk: str) -> List[str]:
+        prompts = []
+        for ch in chunk:
+            if self.in_string:
+                self.raw.append(ch)
+                if self.escape:
+                    self.escape = False
+                elif ch == "\\":
+                    self.escape = True
+                elif ch == '"':
+                    self.in_string = False
+                    prompts.append(orjson.loads("".join(self.raw)))
+                    self.raw = []
+            elif ch == '"':
+                self.in_string = True
+                self.raw = ['"']
+        return prompts
+
+# ============ BATCHING ============
+
+BATCH_MAX_TASKS = 8
+BATCH_WINDOW_SECONDS = 0.25
+
+BATCH_PROMPT_TEMPLATE = """You will be given {count} independent prompt-generation tasks.
+Complete ALL of them. Return ONLY a JSON array with exactly {count} elements, one
+per task in order. Each element must itself be the JSON array of prompt strings
+for that task, nothing else.
+
+{tasks}"""
+
+class LlmBatcher:
+    """Coalesces concurrent generation requests for the same (provider, model,
+    api_key) into a single upstream LLM call.
+
+    The first request for a key opens a collection window; requests arriving
+    within BATCH_WINDOW_SECONDS (up to BATCH_MAX_TASKS) join the same batch and
+    share one HTTP round-trip. A batch of one is sent as a plain direct call.
+    """
+
+    def __init__(self, max_tasks: int = BATCH_MAX_TASKS, window: float = BATCH_WINDOW_SECONDS):
+        self.max_tasks = max_tasks
+        self.window = window
+        self.pending = {}
+        self.timers = {}
+
+    async def submit(self, provider: str, model: str, api_key: str, prompt: str,
+                     max_tokens: int = 2000) -> List[str]:
+        key = (provider, model, api_key)
+        future = asyncio.get_running_loop().create_future()
+        batch = self.pending.get(key)
+        if batch is None:
+            self.pending[key] = [(prompt, max_tokens, future)]
+            self.timers[key] = asyncio.create_task(self._flush_after_window(key))
+        else:
+            batch.append((prompt, max_tokens, future))
+            if len(batch) >= self.max_tasks:
+                self._flush(key)
+        return await future
+
+    async def _flush_after_window(self, key):
+        await asyncio.sleep(self.window)
+        self._flush(key)
+
+    def _flush(self, key):
+        batch = self.pending.pop(key, None)
+        # Cancel the window timer on a size-triggered flush, so it cannot
+        # fire later and prematurely flush the next batch for this key
+        timer = self.timers.pop(key, None)
+        if timer is not None and timer is not asyncio.current_task():
+            timer.cancel()
+        if batch:
+            task = asyncio.create_task(self._run_batch(key, batch))
+            BG_TASKS.add(task)
+            task.add_done_callback(BG_TASKS.discard)
+
+    async def _run_batch(self, key, batch):
+        provider, model, api_key = key
+        if len(batch) == 1:
+            prompt, max_tokens, future = batch[0]
+            await self._run_single(provider, model, api_key, prompt, max_tokens, future)
+            return
+
+        try:
+            tasks = "\n\n".join(f"Task {i + 1}: {prompt}" for i, (prompt, _, _) in enumerate(batch))
+            batch_prompt = BATCH_PROMPT_TEMPLATE.format(count=len(batch), tasks=tasks)
+            # The combined call gets the sum of the per-task budgets
+            batch_tokens = sum(max_tokens for _, max_tokens, _ in batch)
+            response_text = await call_llm(provider, model, api_key, batch_prompt, batch_tokens)
+            results = parse_prompts_response(response_text)
+
+            if len(results) != len(batch) or not all(isinstance(r, list) for r in results):
+                raise ValueError("Batched response does not match task count")
+
+            for (_, _, future), result in zip(batch, results):
+                future.set_result(result)
+        except Exception as e:
+            # Batched call failed or came back malformed: retry each task alone
+            logger.error(f"Batched LLM call failed, retrying individually: {str(e)}")
+            for prompt, max_tokens, future in batch:
+                if not future.done():
+                    task = asyncio.create_task(
+                        self._run_single(provider, model, api_key, prompt, max_tokens, future)
+                    )
+                    BG_TASKS.add(task)
+                    task.add_done_callback(BG_TASKS.discard)
+
+    async def _run_single(self, provider, model, api_key, prompt, max_tokens, future):
+        try:
+            response_text = await call_llm(provider, model, api_key, prompt, max_tokens)
+            future.set_result(parse_prompts_response(response_text))
+        except Exception as e:
+            future.set_exception(e)
+
+llm_batcher = LlmBatcher()
+
+# ============ STREAMING ============
+
+def stream_prompts_ndjson(prompts: List[str]):
+    """Emit already-known prompts as newline-delimited JSON"""
+    for prompt in prompts:
+        yield orjson.dumps(prompt) + b"\n"
+
+async def stream_generation(request: GeneratePromptRequest, api_key: str,
+                            generation_prompt: str, cache_key: str):
+    """Stream prompts to the client as they are generated, then persist.
+
+    Groq supports token streaming, so prompts are emitted as soon as each
+    array element completes. The emergentintegrations providers expose no
+    streaming API; for those the full generation is awaited and the prompts
+    are emitted line by line.
+
+    The response status is already sent when the upstream call runs, so an
+    upstream failure cannot become an HTTP error; instead a terminal
+    {"error": ...} object is emitted, distinguishable from the plain JSON
+    strings of a successful stream.
+    """
+    try:
+        if request.provider == "groq":
+            parser = StreamingPromptParser()
+            prompts_list = []
+            full_text = []
+            async for delta in stream_with_groq(api_key, request.model, generation_prompt,
+                                                max_tokens_for(request.quantity)):
+                full_text.append(delta)
+                for prompt in parser.feed(delta):
+                    prompts_list.append(prompt)
+                    yield orjson.dumps(prompt) + b"\n"
+            if not prompts_list:
+                # Response was not a JSON array; recover via the fallback parser
+                prompts_list = parse_prompts_response("".join(full_text))
+                for prompt in prompts_list:
+                    yield orjson.dumps(prompt) + b"\n"
+        else:
+            prompts_list = await llm_batcher.submit(
+                request.provider, request.model, api_key, generation_prompt,
+                max_tokens_for(request.quantity)
+            )
+            for prompt in prompts_list:
+                yield orjson.dumps(prompt) + b"\n"
+    except HTTPException as e:
+        logger.error(f"Error in streamed generation: {e.detail}")
+        yield orjson.dumps({"error": e.detail}) + b"\n"
+        return
+    except Exception as e:
+        logger.error(f"Error in streamed generation: {str(e)}")
+        yield orjson.dumps({"error": str(e)}) + b"\n"
+        return
+
+    generation = PromptGeneration(
+        keyword=request.keyword,
+        style=request.style,
+        provider=request.provider,
+        model=request.model,
+        quantity=request.quantity,
+        prompts=prompts_list,
+        output_format=request.output_format
+    )
+    doc = generation.model_dump()
+    doc['cache_key'] = cache_key
+    background_db_write(db.prompt_generations.insert_one(doc))
+
 # ============ ROUTES ============
 
 @api_router.get("/")
@@ -119,7 +465,7 @@ async def root():
     return {"message": "Microstock Prompt Generator API"}
 
 @api_router.post("/generate", response_model=PromptGeneration)
-async def generate_prompts(request: GeneratePromptRequest):
+async def generate_prompts(request: GeneratePromptRequest, stream: bool = False):
     try:
         # Determine API key
         if request.use_emergent_key:
@@ -131,64 +477,47 @@ async def generate_prompts(request: GeneratePromptRequest):
         else:
             raise HTTPException(status_code=400, detail="API key required")
         
+        # Check the cache: identical requests reuse the stored generation
+        # instead of paying for another LLM round-trip
+        cache_key = hashlib.sha256(
+            f"{request.keyword}|{request.style}|{request.provider}|{request.model}|{request.quantity}".encode()
+        ).hexdigest()
+        cached = await db.prompt_generations.find_one({"cache_key": cache_key}, {"_id": 0})
+        if cached:
+            if isinstance(cached['created_at'], str):
+                cached['created_at'] = datetime.fromisoformat(cached['created_at'])
+            if stream:
+                return StreamingResponse(
+                    stream_prompts_ndjson(cached['prompts']),
+                    media_type="application/x-ndjson"
+                )
+            return PromptGeneration(**cached)
+
         # Build the generation prompt
-        style_descriptions = {
-            "photo": "realistic photography",
-            "illustration": "digital illustration or artwork",
-            "vector": "vector graphics with clean lines and shapes",
-            "logo": "logo design with branding elements"
-        }
+        generation_prompt = GENERATION_PROMPT_TEMPLATE.format(
+            quantity=request.quantity,
+            style_description=STYLE_DESCRIPTIONS[request.style],
+            style=request.style,
+            keyword=request.keyword
+        )
         
-        generation_prompt = f"""Generate {request.quantity} unique, detailed prompts for {style_descriptions[request.style]} based on the keyword: "{request.keyword}"
+        # ?stream=true emits prompts progressively as newline-delimited JSON
+        if stream:
+            return StreamingResponse(
+                stream_generation(request, api_key, generation_prompt, cache_key),
+                media_type="application/x-ndjson"
+            )
 
-Each prompt should:
-- Be descriptive and specific
-- Include relevant keywords for microstock discoverability
-- Mention composition, lighting, mood, and technical aspects
-- Be optimized for search engines
-- Be suitable for {request.style} style
+        # Generate via the batcher, which may coalesce this request with
+        # other concurrent ones for the same provider/model/key
+        prompts_list = await llm_batcher.submit(
+            request.provider,
+            request.model,
+            api_key,
+            generation_prompt,
+            max_tokens_for(request.quantity)
+        )
 
-Format: Return ONLY a JSON array of strings, nothing else. Example: ["prompt 1", "prompt 2", ...]"""
-        
-        # Generate based on provider
-        if request.provider in ["openai", "claude", "gemini"]:
-            response_text = await generate_with_emergent_integrations(
-                request.provider, 
-                request.model, 
-                api_key, 
-                generation_prompt
-            )
-        elif request.provider == "groq":
-            response_text = await generate_with_groq(
-                api_key,
-                request.model,
-                generation_prompt
-            )
-        else:
-            raise HTTPException(status_code=400, detail="Invalid provider")
-        
-        # Parse response
-        try:
-            # Try to extract JSON from markdown code blocks
-            if "```json" in response_text:
-                json_start = response_text.find("```json") + 7
-                json_end = response_text.find("```", json_start)
-                response_text = response_text[json_start:json_end].strip()
-            elif "```" in response_text:
-                json_start = response_text.find("```") + 3
-                json_end = response_text.find("```", json_start)
-                response_text = response_text[json_start:json_end].strip()
-            
-            prompts_list = json.loads(response_text)
-            
-            if not isinstance(prompts_list, list):
-                raise ValueError("Response is not a list")
-        except Exception as e:
-            logger.error(f"Error parsing response: {str(e)}")
-            # Fallback: split by newlines
-            prompts_list = [line.strip() for line in response_text.split('\n') if line.strip()]
-            prompts_list = [p.lstrip('0123456789.-) ') for p in prompts_list if p]
-        
         # Create generation object
         generation = PromptGeneration(
             keyword=request.keyword,
@@ -200,11 +529,11 @@ Format: Return ONLY a JSON array of strings, nothing else. Example: ["prompt 1",
             output_format=request.output_format
         )
         
-        # Save to database
+        # Persist in the background so the response isn't blocked on Mongo
         doc = generation.model_dump()
-        doc['created_at'] = doc['created_at'].isoformat()
-        await db.prompt_generations.insert_one(doc)
-        
+        doc['cache_key'] = cache_key
+        background_db_write(db.prompt_generations.insert_one(doc))
+
         return generation
         
     except HTTPException:
@@ -216,16 +545,23 @@ Format: Return ONLY a JSON array of strings, nothing else. Example: ["prompt 1",
 @api_router.get("/history", response_model=List[PromptGeneration])
 async def get_history():
     try:
-        generations = await db.prompt_generations.find(
-            {}, 
-            {"_id": 0}
-        ).sort("created_at", -1).to_list(100)
-        
-        for gen in generations:
+        # Project out Mongo-internal fields and convert in a single pass
+        # over the cursor instead of materializing then re-looping
+        generations = []
+        async for gen in db.prompt_generations.find(
+            {},
+            {"_id": 0, "cache_key": 0}
+        ).sort("_id", -1).limit(100):
             if isinstance(gen['created_at'], str):
                 gen['created_at'] = datetime.fromisoformat(gen['created_at'])
-        
-        return generations
+            generations.append(gen)
+
+        # Validate and serialize the whole list in one pydantic-core pass;
+        # returning a Response skips FastAPI's per-item re-validation
+        return Response(
+            content=HISTORY_ADAPTER.dump_json(HISTORY_ADAPTER.validate_python(generations)),
+            media_type="application/json"
+        )
     except Exception as e:
         logger.error(f"Error fetching history: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -241,27 +577,53 @@ async def save_favorite(request: SaveFavoriteRequest):
         )
         
         doc = favorite.model_dump()
-        doc['saved_at'] = doc['saved_at'].isoformat()
-        await db.favorites.insert_one(doc)
-        
+        background_db_write(db.favorites.insert_one(doc))
+
         return favorite
     except Exception as e:
         logger.error(f"Error saving favorite: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
+@api_router.post("/favorites/bulk", response_model=List[FavoritePrompt])
+async def save_favorites_bulk(requests: List[SaveFavoriteRequest]):
+    try:
+        favorites = [
+            FavoritePrompt(
+                prompt_generation_id=r.prompt_generation_id,
+                prompt_text=r.prompt_text,
+                keyword=r.keyword,
+                style=r.style
+            )
+            for r in requests
+        ]
+
+        # One insert_many round-trip instead of N insert_one calls;
+        # unordered so Mongo can parallelize and continue past duplicates
+        docs = [favorite.model_dump() for favorite in favorites]
+        if docs:
+            background_db_write(db.favorites.insert_many(docs, ordered=False))
+
+        return favorites
+    except Exception as e:
+        logger.error(f"Error saving favorites in bulk: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
 @api_router.get("/favorites", response_model=List[FavoritePrompt])
 async def get_favorites():
     try:
-        favorites = await db.favorites.find(
+        favorites = []
+        async for fav in db.favorites.find(
             {},
             {"_id": 0}
-        ).sort("saved_at", -1).to_list(100)
-        
-        for fav in favorites:
+        ).sort("_id", -1).limit(100):
             if isinstance(fav['saved_at'], str):
                 fav['saved_at'] = datetime.fromisoformat(fav['saved_at'])
-        
-        return favorites
+            favorites.append(fav)
+
+        return Response(
+            content=FAVORITES_ADAPTER.dump_json(FAVORITES_ADAPTER.validate_python(favorites)),
+            media_type="application/json"
+        )
     except Exception as e:
         logger.error(f"Error fetching favorites: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -292,6 +654,33 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+@app.on_event("startup")
+async def create_indexes():
+    # Sparse because documents written before caching existed lack the field
+    await db.prompt_generations.create_index("cache_key", unique=True, sparse=True)
+    # /history and /favorites sort on _id (ObjectIds embed a timestamp), so
+    # the built-in primary index covers them. The unique id indexes back the
+    # delete-by-id lookup and enforce that application ids never collide,
+    # which delete_one and the unordered bulk insert both assume
+    await db.favorites.create_index("id", unique=True)
+    await db.prompt_generations.create_index("id", unique=True)
+
 @app.on_event("shutdown")
 async def shutdown_db_client():
-    client.close()
\ No newline at end of file
+    for groq_client in GROQ_CLIENTS.values():
+        await groq_client.close()
+    client.close()
+
+if __name__ == "__main__":
+    import uvicorn
+
+    # One worker per core; uvloop + httptools move the event loop and HTTP
+    # parsing into C
+    uvicorn.run(
+        "server:app",
+        host="0.0.0.0",
+        port=8001,
+        workers=os.cpu_count(),
+        loop="uvloop",
+        http="httptools"
+    )
\ No newline at end of file